@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Report import time of application modules using 'python -X importtime'")
+    parser.add_argument("modules", nargs="*", default=["cert_registry.app", "gen_token_hmac"], help="Modules to import (default: %(default)s)")
+    parser.add_argument("-t", "--top", type=int, default=15, help="Number of slowest imports to report per module (default: %(default)s)")
+
+    return parser.parse_args()
+
+
+def measure(module: str) -> list[tuple[int, int, int, str]]:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to import '{module}': {process.stderr.strip().splitlines()[-1]}")
+
+    imports = []
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name))
+    return imports
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    for module in args.modules:
+        imports = measure(module)
+        total_us = sum(i[1] for i in imports if i[2] == 0)
+        print(f"{module}: {total_us / 1000:.1f} ms total, {len(imports)} modules imported")
+
+        for self_us, cumulative_us, _, name in sorted(imports, key=lambda i: i[1], reverse=True)[:args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} ms cumulative  {self_us / 1000:8.1f} ms self  {name}")
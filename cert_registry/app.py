@@ -2,6 +2,9 @@ import logging
 from pathlib import Path
 from flask import Flask
 from .models.config import Config
+from .key_pool import KeyPool
+from .executor import CommandExecutor
+from .ocsp import OcspCache
 from .routes import api as api_blueprint
 
 def create_app() -> Flask:
@@ -12,6 +15,9 @@ def create_app() -> Flask:
         
     setup_paths(config)
     setup_logging(config)
+    setup_key_pool(app, config)
+    app.extensions["executor"] = CommandExecutor(config.certbot_max_concurrency, config.certbot_timeout)
+    setup_ocsp_cache(app, config)
     app.register_blueprint(api_blueprint)
     
     return app
@@ -34,6 +40,18 @@ def setup_paths(config: Config) -> None:
         Path(value).expanduser().parent.mkdir(parents=True, exist_ok=True)
 
 
+def setup_key_pool(app: Flask, config: Config) -> None:
+    key_pool = KeyPool.from_certs(config.certs, config.key_pool_depth, config.key_pool_workers)
+    key_pool.start()
+    app.extensions["key_pool"] = key_pool
+
+
+def setup_ocsp_cache(app: Flask, config: Config) -> None:
+    ocsp_cache = OcspCache(config.certs, config.certs_dir, config.ocsp_workers)
+    ocsp_cache.start()
+    app.extensions["ocsp_cache"] = ocsp_cache
+
+
 def setup_logging(config: Config) -> None:    
     level_name = (config.log_level or "INFO").upper()
     level = getattr(logging, level_name, logging.INFO)
@@ -0,0 +1,202 @@
+import os
+import time
+import signal
+import logging
+import threading
+import subprocess
+from dataclasses import dataclass
+from typing import ClassVar, IO, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CommandResult:
+    argv: tuple[str, ...]
+    returncode: int | None
+    duration: float
+    timed_out: bool = False
+    cancelled: bool = False
+    error: str | None = None # Set when the command could not be started
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.cancelled and self.error is None
+
+
+class CommandError(RuntimeError):
+    def __init__(self, result: CommandResult) -> None:
+        if result.error is not None:
+            reason = f"failed to start: {result.error}"
+        elif result.timed_out:
+            reason = f"timed out after {result.duration:.1f}s"
+        elif result.cancelled:
+            reason = "was cancelled"
+        else:
+            reason = f"exited with code {result.returncode}"
+        super().__init__(f"Command '{' '.join(result.argv)}' {reason}")
+        self.result = result
+
+
+class CommandExecutor:
+    POLL_INTERVAL: ClassVar[float] = 0.5
+    KILL_GRACE_PERIOD: ClassVar[float] = 5.0
+
+    def __init__(self, max_concurrency: int, timeout: float) -> None:
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._stats = { "runs": 0, "failures": 0, "timeouts": 0, "cancelled": 0, "errors": 0, "totalDuration": 0.0, "lastDuration": None, "lastReturnCode": None }
+
+    def run(
+        self,
+        argv: Sequence[str],
+        timeout: float | None = None,
+        log: logging.Logger | None = None,
+        cancel: threading.Event | None = None,
+        env: dict[str, str] | None = None,
+        check: bool = True
+    ) -> CommandResult:
+        argv = tuple(argv)
+        timeout = timeout or self.timeout
+        log = log or logger.getChild(os.path.basename(argv[0]))
+        cancel = cancel or threading.Event()
+        start = time.monotonic()
+
+        # Waiting for a free slot counts towards the timeout as well
+        while not self._slots.acquire(timeout=self.POLL_INTERVAL):
+            if cancel.is_set() or time.monotonic() - start >= timeout:
+                result = CommandResult(argv, None, time.monotonic() - start, timed_out=not cancel.is_set(), cancelled=cancel.is_set())
+                return self._finish(result, log, check)
+
+        try:
+            with self._lock:
+                self._running += 1
+            result = self._execute(argv, start + timeout, log, cancel, env)
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._slots.release()
+
+        return self._finish(result, log, check)
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return { **self._stats, "running": self._running, "maxConcurrency": self.max_concurrency }
+
+    def _execute(
+        self,
+        argv: tuple[str, ...],
+        deadline: float,
+        log: logging.Logger,
+        cancel: threading.Event,
+        env: dict[str, str] | None
+    ) -> CommandResult:
+        log.info("Running command: %s", " ".join(argv))
+        start = time.monotonic()
+        try:
+            process = subprocess.Popen(
+                argv,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env={ **os.environ, **env } if env else None,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                start_new_session=True # Own process group, so children are killed along with it
+            )
+        except OSError as e:
+            return CommandResult(argv, None, time.monotonic() - start, error=str(e))
+        reader = threading.Thread(target=self._stream_output, args=(process.stdout, log), daemon=True)
+        reader.start()
+
+        timed_out = cancelled = False
+        while True:
+            try:
+                process.wait(timeout=self.POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+
+            if cancel.is_set():
+                cancelled = True
+            elif time.monotonic() >= deadline:
+                timed_out = True
+            else:
+                continue
+            self._terminate(process)
+            break
+
+        # A child left in the process group can keep stdout open after the command itself exited
+        reader.join(timeout=max(deadline - time.monotonic(), 0))
+        if reader.is_alive():
+            # Reader may be still draining last lines, the command overran only if a child holds the output open
+            if self._group_alive(process):
+                timed_out = not cancelled
+                self._kill_group(process)
+            reader.join(timeout=self.KILL_GRACE_PERIOD)
+        return CommandResult(argv, process.returncode, time.monotonic() - start, timed_out, cancelled)
+
+    def _terminate(self, process: subprocess.Popen) -> None:
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(process.pid, sig)
+            except ProcessLookupError:
+                return
+            try:
+                process.wait(timeout=self.KILL_GRACE_PERIOD)
+                return
+            except subprocess.TimeoutExpired:
+                continue
+
+    def _finish(self, result: CommandResult, log: logging.Logger, check: bool) -> CommandResult:
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["failures"] += 0 if result.ok else 1
+            self._stats["timeouts"] += 1 if result.timed_out else 0
+            self._stats["cancelled"] += 1 if result.cancelled else 0
+            self._stats["errors"] += 1 if result.error is not None else 0
+            self._stats["totalDuration"] += result.duration
+            self._stats["lastDuration"] = result.duration
+            self._stats["lastReturnCode"] = result.returncode
+
+        log.log(
+            logging.INFO if result.ok else logging.ERROR,
+            "Command finished (code=%s, duration=%.2fs, timed_out=%s, cancelled=%s, error=%s)",
+            result.returncode, result.duration, result.timed_out, result.cancelled, result.error
+        )
+
+        if check and not result.ok:
+            raise CommandError(result)
+        return result
+
+    @staticmethod
+    def _group_alive(process: subprocess.Popen) -> bool:
+        try:
+            os.killpg(process.pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    @staticmethod
+    def _kill_group(process: subprocess.Popen) -> None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def _stream_output(stream: IO[str], log: logging.Logger) -> None:
+        # Reading must continue until EOF, otherwise the command gets EPIPE on its next write
+        with stream:
+            for line in stream:
+                try:
+                    log.info(line.rstrip("\n"))
+                except Exception:
+                    logger.exception("Failed to log command output line")
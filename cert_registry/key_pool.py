@@ -0,0 +1,158 @@
+import logging
+import threading
+import multiprocessing
+from queue import Queue, Empty, Full
+from concurrent.futures import ProcessPoolExecutor, Future
+from dataclasses import dataclass
+from typing import ClassVar, Iterable
+from .models.cert import Cert, CertKeyType
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class KeySpec:
+    key_type: str
+    rsa_key_size: int | None = None
+    elliptic_curve: str | None = None
+
+    @classmethod
+    def from_cert(cls, cert: Cert) -> "KeySpec":
+        if cert.key_type == CertKeyType.RSA.value:
+            return cls(key_type=cert.key_type, rsa_key_size=cert.rsa_key_size)
+        return cls(key_type=cert.key_type, elliptic_curve=cert.elliptic_curve)
+
+    def __str__(self) -> str:
+        return f"{self.key_type}-{self.rsa_key_size or self.elliptic_curve}"
+
+
+# cryptography is imported on first use, it is only needed once keys are generated
+def generate_key(spec: KeySpec) -> bytes:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+    
+    if spec.key_type == CertKeyType.RSA.value:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=spec.rsa_key_size)
+    else:
+        key = ec.generate_private_key(getattr(ec, spec.elliptic_curve.upper())())
+
+    return key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+
+def build_csr(key_pem: bytes, domains: Iterable[str]) -> bytes:
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives import hashes, serialization
+    
+    domains = list(domains)
+    key = serialization.load_pem_private_key(key_pem, password=None)
+    csr = (
+        x509.CertificateSigningRequestBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, domains[0])]))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName(d) for d in domains]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    return csr.public_bytes(serialization.Encoding.PEM)
+
+
+class KeyPool:
+    IDLE_INTERVAL: ClassVar[float] = 30.0
+
+    def __init__(self, specs: Iterable[KeySpec], depth: int, workers: int) -> None:
+        self.depth = depth
+        self.workers = workers
+        self._queues: dict[KeySpec, Queue[bytes]] = { spec: Queue(maxsize=max(depth, 1)) for spec in specs }
+        self._pending: dict[KeySpec, int] = { spec: 0 for spec in self._queues }
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._executor: ProcessPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_certs(cls, certs: Iterable[Cert], depth: int, workers: int) -> "KeyPool":
+        return cls({ KeySpec.from_cert(cert) for cert in certs }, depth, workers)
+
+    def start(self) -> None:
+        if self._thread is not None or self.depth <= 0 or not self._queues:
+            return
+
+        # Spawn instead of fork, forking a process that already runs threads is unsafe
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self._thread = threading.Thread(target=self._run, name="key-pool", daemon=True)
+        self._thread.start()
+        logger.info("Key pool started (depth=%s, workers=%s, specs=%s)", self.depth, self.workers, ", ".join(map(str, self._queues)))
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def acquire(self, cert: Cert) -> bytes:
+        spec = KeySpec.from_cert(cert)
+        if self.depth <= 0:
+            return generate_key(spec)
+        queue = self._queues.get(spec)
+
+        try:
+            if queue is None:
+                raise Empty
+            key = queue.get_nowait()
+        except Empty:
+            logger.warning("Key pool has no ready key for %s (cert=%s), generating key inline", spec, cert.key)
+            key = generate_key(spec)
+
+        self._wakeup.set()
+        return key
+
+    def depths(self) -> dict[str, int]:
+        if self.depth <= 0:
+            return {}
+        return { str(spec): queue.qsize() for spec, queue in self._queues.items() }
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._refill()
+            self._wakeup.wait(timeout=self.IDLE_INTERVAL)
+            self._wakeup.clear()
+
+    def _refill(self) -> None:
+        submitted: list[tuple[KeySpec, Future]] = []
+        with self._lock:
+            for spec, queue in self._queues.items():
+                missing = self.depth - queue.qsize() - self._pending[spec]
+                for _ in range(missing):
+                    try:
+                        future = self._executor.submit(generate_key, spec)
+                    except RuntimeError: # Executor has been shut down
+                        break
+                    self._pending[spec] += 1
+                    submitted.append((spec, future))
+
+        # Callbacks are attached after releasing the lock, a finished future runs its callback immediately in this thread
+        for spec, future in submitted:
+            future.add_done_callback(lambda f, spec=spec: self._on_generated(spec, f))
+
+        logger.debug("Key pool depth: %s", self.depths())
+
+    def _on_generated(self, spec: KeySpec, future: Future) -> None:
+        with self._lock:
+            self._pending[spec] -= 1
+
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            logger.error("Failed to generate %s key for key pool: %s", spec, error)
+            return
+
+        try:
+            self._queues[spec].put_nowait(future.result())
+        except Full:
+            pass
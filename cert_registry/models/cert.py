@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from pathlib import Path
 from .require import Require
 from typing import ClassVar, Any
 from enum import Enum
@@ -10,13 +11,32 @@ class CertPlugin(Enum):
     def values(cls) -> list[str]:
         return [item.value for item in cls]
     
+    @property
+    def module(self) -> str:
+        return f"certbot_{self.value.replace('-', '_')}"
+
+
+class CertKeyType(Enum):
+    RSA = "rsa"
+    ECDSA = "ecdsa"
+    
+    @classmethod
+    def values(cls) -> list[str]:
+        return [item.value for item in cls]
+    
 
 @dataclass(frozen=True)
 class Cert:   
+    ALLOWED_RSA_KEY_SIZES: ClassVar[list[int]] = [2048, 3072, 4096]
+    ALLOWED_ELLIPTIC_CURVES: ClassVar[list[str]] = ["secp256r1", "secp384r1", "secp521r1"]
+    
     key: str
     email: str
     domains: tuple[str, ...]
     plugin: str
+    key_type: str = CertKeyType.ECDSA.value
+    rsa_key_size: int = 2048
+    elliptic_curve: str = "secp256r1"
     
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "Cert":
@@ -33,17 +53,35 @@ class Cert:
         Require.type("key", key, str)
         Require.email("email", email)
         Require.one_of("plugin", plugin, CertPlugin.values())
-        Require.installed_module("plugin", plugin, "certbot-dns-route53")
         Require.type("domains", domains, list)
         for i, domain in enumerate(domains):
             Require.domain(f"domains[{i}]", domain)
         
+        key_type = data.get("key_type", cls.key_type)
+        rsa_key_size = data.get("rsa_key_size", cls.rsa_key_size)
+        elliptic_curve = data.get("elliptic_curve", cls.elliptic_curve)
+        
+        Require.one_of("key_type", key_type, CertKeyType.values())
+        Require.type("rsa_key_size", rsa_key_size, int)
+        Require.one_of("rsa_key_size", rsa_key_size, cls.ALLOWED_RSA_KEY_SIZES)
+        Require.one_of("elliptic_curve", elliptic_curve, cls.ALLOWED_ELLIPTIC_CURVES)
+        
         return cls(
             key=key,
             email=email,
             domains=tuple(domains),
-            plugin=plugin
+            plugin=plugin,
+            key_type=key_type,
+            rsa_key_size=rsa_key_size,
+            elliptic_curve=elliptic_curve
         )
+    
+    def require_plugin(self) -> None:
+        # Plugin is probed on issuance instead of config load to keep startup fast
+        Require.installed_module("plugin", self.plugin, CertPlugin(self.plugin).module)
+    
+    def live_path(self, certs_dir: str) -> Path:
+        return Path(certs_dir).expanduser() / "live" / self.key
 
 
 #class Cert:
@@ -17,6 +17,7 @@ class ConfigError(RuntimeError):
 class Config:
     REQUIRED_ENVS: ClassVar[set[str]] = { "hmac_key", "aws_access_key_id", "aws_secret_access_key" }
     ALLOWED_LOG_LEVELS: ClassVar[set[str]] = { "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL" }
+    INT_ENVS: ClassVar[dict[str, int]] = { "key_pool_depth": 0, "key_pool_workers": 1, "certbot_timeout": 1, "certbot_max_concurrency": 1, "ticket_ttl": 0, "ocsp_workers": 0 } # Env name -> minimal value
     
     log_level: str = "INFO"
     acme_server: str = "https://acme-v02.api.letsencrypt.org/directory"
@@ -25,16 +26,23 @@ class Config:
     conf_file: str = "/config/config.yaml"
     certbot_bin: str = "/usr/bin/certbot"
     certbot_lock_file: str = "/locks/certbot.lock"
+    certbot_timeout: int = 600
+    certbot_max_concurrency: int = 1
+    key_pool_depth: int = 0
+    key_pool_workers: int = 1
+    ticket_ttl: int = 300
+    ocsp_workers: int = 2
     hmac_key: Optional[str] = None 
     aws_access_key_id: Optional[str] = None
     aws_secret_access_key: Optional[str] = None
     certs: list[Cert] = field(default_factory=list)
     tokens: list[Token] = field(default_factory=list)
+    ticket_epoch: str = ""
     
     @classmethod
     def load(cls) -> "Config":
         params: Dict[str, Any] = {}
-        skip_env_params = { "certs", "tokens" }
+        skip_env_params = { "certs", "tokens", "ticket_epoch" }
         
         # Load environments
         for f in fields(cls):
@@ -51,6 +59,13 @@ class Config:
             raise ConfigError(f"Invalid LOG_LEVEL={log_level}, allowed choices: {', '.join(cls.ALLOWED_LOG_LEVELS)}")
         params["log_level"] = log_level
         
+        for env, min_val in cls.INT_ENVS.items():
+            try:
+                params[env] = int(params[env])
+                Require.min(env.upper(), params[env], min_val)
+            except ValueError:
+                raise ConfigError(f"Invalid {env.upper()}={params[env]}, must be an integer not lower than {min_val}")
+        
         missing_envs = [env for env in cls.REQUIRED_ENVS if not params.get(env)]
         if missing_envs:
             raise ConfigError(f"Missing required environment variables: {', '.join(env.upper() for env in missing_envs)}")
@@ -59,7 +74,6 @@ class Config:
             Require.base64("HMAC_KEY", params["hmac_key"])
         except ValueError as e:
             raise ConfigError(e)
-        print(hmac.new(base64.b64decode(params["hmac_key"])))
         
         
         try:
@@ -79,7 +93,16 @@ class Config:
         except ValueError as e:
             raise ConfigError(f"Failed to parse '{conf_file}' config file: {e}")
         
+        # Session tickets signed with a different config (or token values) are rejected after reload
+        epoch = hashlib.sha256(conf_file.read_bytes())
+        for token in params["tokens"]:
+            epoch.update(f"{token.name}.{token.value}".encode("utf-8"))
+        params["ticket_epoch"] = epoch.hexdigest()[:16]
+        
         return cls(**params)
+    
+    def hmac_secret(self) -> bytes:
+        return base64.b64decode(self.hmac_key)
 
     @staticmethod
     def _parse_certs(certs_raw: Any) -> list[Cert]:
@@ -5,12 +5,14 @@ import binascii
 import ipaddress
 import importlib.util
 from pathlib import Path
-from typing import Any, Match, Type, TypeVar, Pattern
+from typing import Any, ClassVar, Match, Type, TypeVar, Pattern
 
 T = TypeVar("T")
 
 
 class Require():
+    _installed_modules: ClassVar[set[str]] = set()
+    
     @staticmethod
     def present(
         field: str, 
@@ -193,7 +195,7 @@ class Require():
     ) -> None:
         if val not in allowed_values:
             Require._raise_error(
-                default_msg=f"Value '{field}={val}' is invalid, allowed choices: {(', ').join(allowed_values)}",
+                default_msg=f"Value '{field}={val}' is invalid, allowed choices: {(', ').join(map(str, allowed_values))}",
                 custom_msg=custom_msg
             )
 
@@ -206,7 +208,7 @@ class Require():
     ) -> None:
         if val in not_allowed_values:
             Require._raise_error(
-                default_msg=f"Value '{field}={val}' is duplicated, cannot be one of: {(', ').join(not_allowed_values)}",
+                default_msg=f"Value '{field}={val}' is duplicated, cannot be one of: {(', ').join(map(str, not_allowed_values))}",
                 custom_msg=custom_msg
             )
     
@@ -214,10 +216,10 @@ class Require():
     def installed_module(
         field: str,
         val: str,
-        module_name: list[Any], 
+        module_name: str, 
         custom_msg: str | None = None
     ) -> None:
-        if importlib.util.find_spec(module_name) is not None:
+        if not Require._is_module_installed(module_name):
             Require._raise_error(
                 default_msg=f"Value '{field}={val}' requires module '{module_name}' to be installed",
                 custom_msg=custom_msg
@@ -237,6 +239,16 @@ class Require():
                 custom_msg=custom_msg
             )
 
+    @staticmethod
+    def _is_module_installed(module_name: str) -> bool:
+        # Only found modules are remembered, find_spec walks sys.path on every call and a missing one may be installed later
+        if module_name in Require._installed_modules:
+            return True
+        if importlib.util.find_spec(module_name) is None:
+            return False
+        Require._installed_modules.add(module_name)
+        return True
+
     @staticmethod
     def _raise_error(
         default_msg: str, 
@@ -1,4 +1,7 @@
 import re
+import hmac
+import hashlib
+import ipaddress
 from dataclasses import dataclass
 from .require import Require
 from typing import Any
@@ -36,10 +39,22 @@ class TokenPermission:
         Require.one_of(f"permissions[{index}]", action, PermissionAction.values())
         
         return cls(scope, action)
+    
+    def allows(self, scope: str | None, action: str) -> bool:
+        # Health is the only action granted by permission of any scope, other unscoped actions require '*' scope
+        if scope is None:
+            scope_ok = self.scope == "*" or action == PermissionAction.HEALTH.value
+        else:
+            scope_ok = self.scope in ("*", scope)
+        return scope_ok and self.action in ("*", action)
+    
+    def __str__(self) -> str:
+        return f"{self.scope}:{self.action}"
 
     
 @dataclass(frozen=True)
 class Token:
+    name: str
     value: str
     allowed_ips: list[str]
     permissions: list[TokenPermission]
@@ -68,6 +83,23 @@ class Token:
             permission = TokenPermission.init(i, permission)
             permissions.append(permission)
         
-        return cls(token_value, allowed_ips, permissions)
+        return cls(env, token_value, allowed_ips, permissions)
+    
+    def matches(self, token: str, hmac_key: bytes) -> bool:
+        # Env holds HMAC of '<name>.<token>' generated by gen_token_hmac.py, not the token itself
+        digest = hmac.new(hmac_key, f"{self.name}.{token}".encode("utf-8"), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(digest.encode("utf-8"), self.value.encode("utf-8"))
+    
+    def allows_ip(self, src_addr: str | None) -> bool:
+        if not src_addr:
+            return False
+        try:
+            addr = ipaddress.ip_address(src_addr)
+        except ValueError:
+            return False
+        return any(addr in ipaddress.ip_network(ip, strict=False) for ip in self.allowed_ips)
+    
+    def allows(self, scope: str | None, action: str) -> bool:
+        return any(permission.allows(scope, action) for permission in self.permissions)
 
         
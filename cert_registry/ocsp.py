@@ -0,0 +1,304 @@
+import os
+import fcntl
+import logging
+import threading
+import http.client
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ClassVar, Iterable, Any
+from urllib.parse import urlsplit
+from .models.cert import Cert
+
+logger = logging.getLogger(__name__)
+
+
+class OcspError(RuntimeError):
+    pass
+
+
+class OcspUnsupportedError(OcspError):
+    pass
+
+
+class OcspLockedError(OcspError):
+    pass
+
+
+@dataclass(frozen=True)
+class OcspEntry:
+    response: bytes # DER encoded
+    serial: int
+    status: str
+    this_update: datetime
+    next_update: datetime | None
+    refresh_at: datetime
+
+    def is_fresh(self) -> bool:
+        return self.next_update is None or self.next_update > datetime.now(timezone.utc)
+
+
+def leaf_serial(fullchain_pem: bytes) -> int:
+    from cryptography import x509
+
+    return x509.load_pem_x509_certificate(fullchain_pem).serial_number
+
+
+class OcspCache:
+    TICK_INTERVAL: ClassVar[float] = 30.0
+    DEFAULT_REFRESH_INTERVAL: ClassVar[timedelta] = timedelta(hours=1)
+    RETRY_INTERVAL: ClassVar[timedelta] = timedelta(minutes=5)
+    LOCKED_RETRY_INTERVAL: ClassVar[timedelta] = timedelta(seconds=30)
+    UNSUPPORTED_RETRY_INTERVAL: ClassVar[timedelta] = timedelta(days=1)
+    REQUEST_TIMEOUT: ClassVar[float] = 10.0
+
+    def __init__(self, certs: Iterable[Cert], certs_dir: str, workers: int) -> None:
+        self.certs = { cert.key: cert for cert in certs }
+        self.certs_dir = certs_dir
+        self.workers = workers
+        self._entries: dict[str, OcspEntry] = {}
+        self._due: dict[str, datetime] = {}
+        self._in_flight: set[str] = set()
+        self._unsupported: set[str] = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._executor: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None or self.workers <= 0 or not self.certs:
+            return
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocsp")
+        self._thread = threading.Thread(target=self._run, name="ocsp-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("OCSP cache started (workers=%s, certs=%s)", self.workers, len(self.certs))
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get(self, cert_key: str, serial: int | None = None) -> OcspEntry | None:
+        entry = self._entries.get(cert_key)
+        if entry is None or not entry.is_fresh():
+            return None
+        if serial is not None and entry.serial != serial:
+            # Certificate has been renewed since the response was fetched
+            self.request_refresh(cert_key)
+            return None
+        return entry
+
+    def request_refresh(self, cert_key: str) -> None:
+        with self._lock:
+            if cert_key not in self.certs or cert_key in self._in_flight:
+                return
+            self._due[cert_key] = datetime.now(timezone.utc)
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            now = datetime.now(timezone.utc)
+            with self._lock:
+                due = [
+                    key for key in self.certs
+                    if key not in self._in_flight and self._due.get(key, now) <= now
+                ]
+                self._in_flight.update(due)
+
+            for key in due:
+                try:
+                    self._executor.submit(self._refresh, self.certs[key])
+                except RuntimeError: # Executor has been shut down
+                    return
+            self._wakeup.wait(timeout=self.TICK_INTERVAL)
+            self._wakeup.clear()
+
+    def _refresh(self, cert: Cert) -> None:
+        now = datetime.now(timezone.utc)
+        try:
+            entry = self._load_or_fetch(cert)
+        except FileNotFoundError:
+            logger.debug("Skipping OCSP refresh for '%s', certificate has not been issued yet", cert.key)
+            self._reschedule(cert.key, now + self.RETRY_INTERVAL)
+        except OcspUnsupportedError as e:
+            if cert.key not in self._unsupported:
+                self._unsupported.add(cert.key)
+                logger.info("OCSP response will not be served for '%s': %s", cert.key, e)
+            self._reschedule(cert.key, now + self.UNSUPPORTED_RETRY_INTERVAL)
+        except OcspLockedError:
+            logger.debug("OCSP response for '%s' is being refreshed by another worker", cert.key)
+            self._reschedule(cert.key, now + self.LOCKED_RETRY_INTERVAL)
+        except Exception as e:
+            logger.warning("Failed to refresh OCSP response for '%s': %s", cert.key, e)
+            self._reschedule(cert.key, now + self.RETRY_INTERVAL)
+        else:
+            self._unsupported.discard(cert.key)
+            self._entries[cert.key] = entry
+            self._reschedule(cert.key, entry.refresh_at)
+            logger.info("Refreshed OCSP response for '%s' (status=%s, next_update=%s)", cert.key, entry.status, entry.next_update)
+
+    def _reschedule(self, cert_key: str, at: datetime) -> None:
+        with self._lock:
+            self._due[cert_key] = at
+            self._in_flight.discard(cert_key)
+
+    def _load_or_fetch(self, cert: Cert) -> OcspEntry:
+        # Imported here to keep cryptography out of app startup
+        from cryptography import x509
+        from cryptography.x509 import ocsp
+        from cryptography.x509.oid import AuthorityInformationAccessOID
+        from cryptography.hazmat.primitives import hashes, serialization
+
+        live_path = cert.live_path(self.certs_dir)
+        leaf = x509.load_pem_x509_certificate((live_path / "cert.pem").read_bytes())
+        issuer = x509.load_pem_x509_certificates((live_path / "chain.pem").read_bytes())[0]
+
+        try:
+            aia = leaf.extensions.get_extension_for_class(x509.AuthorityInformationAccess).value
+            url = next(d.access_location.value for d in aia if d.access_method == AuthorityInformationAccessOID.OCSP)
+        except (x509.ExtensionNotFound, StopIteration):
+            raise OcspUnsupportedError("Certificate does not contain OCSP responder URL")
+
+        # Responses are shared by all gunicorn workers through a file, only one of them queries the responder
+        cache_file = Path(self.certs_dir).expanduser() / "ocsp" / f"{cert.key}.der"
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = self._load_cached(cache_file, leaf, issuer)
+        if entry is not None:
+            return entry
+
+        with open(cache_file.with_suffix(".lock"), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise OcspLockedError(f"Lock on '{lock_file.name}' is held by another worker")
+
+            entry = self._load_cached(cache_file, leaf, issuer)
+            if entry is not None:
+                return entry
+
+            request = ocsp.OCSPRequestBuilder().add_certificate(leaf, issuer, hashes.SHA1()).build()
+            body = self._post(url, request.public_bytes(serialization.Encoding.DER))
+            entry = self._parse(body, leaf, issuer)
+
+            tmp_file = cache_file.with_suffix(".tmp")
+            tmp_file.write_bytes(body)
+            os.replace(tmp_file, cache_file)
+            return entry
+
+    def _load_cached(self, cache_file: Path, leaf: Any, issuer: Any) -> OcspEntry | None:
+        try:
+            entry = self._parse(cache_file.read_bytes(), leaf, issuer)
+        except FileNotFoundError:
+            return None
+        except (OcspError, ValueError) as e:
+            logger.debug("Ignoring cached OCSP response '%s': %s", cache_file, e)
+            return None
+        return entry if entry.refresh_at > datetime.now(timezone.utc) else None
+
+    def _parse(self, body: bytes, leaf: Any, issuer: Any) -> OcspEntry:
+        from cryptography.x509 import ocsp
+
+        response = ocsp.load_der_ocsp_response(body)
+        if response.response_status != ocsp.OCSPResponseStatus.SUCCESSFUL:
+            raise OcspError(f"Responder returned '{response.response_status.name}' status")
+
+        expected = ocsp.OCSPRequestBuilder().add_certificate(leaf, issuer, response.hash_algorithm).build()
+        if response.serial_number != leaf.serial_number or response.issuer_key_hash != expected.issuer_key_hash:
+            raise OcspError("Responder returned response for a different certificate")
+        self._verify_signature(response, issuer)
+
+        this_update = response.this_update_utc
+        next_update = response.next_update_utc
+        if next_update is not None:
+            # Refresh in the middle of validity window, so a failed refresh still has time to be retried
+            refresh_at = this_update + (next_update - this_update) / 2
+        else:
+            refresh_at = datetime.now(timezone.utc) + self.DEFAULT_REFRESH_INTERVAL
+
+        return OcspEntry(
+            response=body,
+            serial=leaf.serial_number,
+            status=response.certificate_status.name,
+            this_update=this_update,
+            next_update=next_update,
+            refresh_at=refresh_at
+        )
+
+    @staticmethod
+    def _verify_signature(response: Any, issuer: Any) -> None:
+        from cryptography import x509
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.x509.oid import ExtendedKeyUsageOID
+        from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+
+        signer = issuer
+        responder = next((c for c in response.certificates if c != issuer), None)
+        if responder is not None:
+            # Delegated responder must be issued by the issuer for OCSP signing (RFC 6960, section 4.2.2.2)
+            now = datetime.now(timezone.utc)
+            try:
+                responder.verify_directly_issued_by(issuer)
+            except (ValueError, TypeError, InvalidSignature):
+                raise OcspError("Responder certificate is not issued by the certificate issuer")
+            try:
+                eku = responder.extensions.get_extension_for_class(x509.ExtendedKeyUsage).value
+            except x509.ExtensionNotFound:
+                eku = []
+            if ExtendedKeyUsageOID.OCSP_SIGNING not in eku:
+                raise OcspError("Responder certificate is not allowed to sign OCSP responses")
+            if not responder.not_valid_before_utc <= now <= responder.not_valid_after_utc:
+                raise OcspError("Responder certificate is expired or not yet valid")
+            signer = responder
+
+        public_key = signer.public_key()
+        try:
+            if isinstance(public_key, rsa.RSAPublicKey):
+                public_key.verify(response.signature, response.tbs_response_bytes, padding.PKCS1v15(), response.signature_hash_algorithm)
+            elif isinstance(public_key, ec.EllipticCurvePublicKey):
+                public_key.verify(response.signature, response.tbs_response_bytes, ec.ECDSA(response.signature_hash_algorithm))
+            else:
+                public_key.verify(response.signature, response.tbs_response_bytes)
+        except InvalidSignature:
+            raise OcspError("Response signature is invalid")
+
+    def _post(self, url: str, body: bytes) -> bytes:
+        parts = urlsplit(url)
+        path = f"{parts.path or '/'}?{parts.query}" if parts.query else parts.path or "/"
+        headers = { "Content-Type": "application/ocsp-request", "Accept": "application/ocsp-response" }
+
+        # Connections are kept per worker thread and per responder, one retry covers closed keep-alive connection
+        for attempt in range(2):
+            conn = self._get_connection(parts.scheme, parts.netloc)
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                self._drop_connection(parts.scheme, parts.netloc)
+                if attempt:
+                    raise
+                continue
+
+            if response.status != 200:
+                raise OcspError(f"Responder '{url}' returned HTTP {response.status}")
+            return data
+
+    def _get_connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        connections = self._local.__dict__.setdefault("connections", {})
+        conn = connections.get((scheme, netloc))
+        if conn is None:
+            conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conn_cls(netloc, timeout=self.REQUEST_TIMEOUT)
+            connections[(scheme, netloc)] = conn
+        return conn
+
+    def _drop_connection(self, scheme: str, netloc: str) -> None:
+        conn = self._local.__dict__.get("connections", {}).pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
@@ -1,6 +1,8 @@
+import base64
 from .models.token import PermissionAction
-from flask import Blueprint, Response, jsonify, send_file, abort, request, current_app as app
-from .utils import require_api_access, build_response, run_cmd, get_conf
+from .ocsp import leaf_serial
+from flask import Blueprint, Response, jsonify, send_file, abort, request, g, current_app as app
+from .utils import require_api_access, require_cert_access, build_response, abort_response, get_conf, get_key_pool, get_executor, get_ocsp_cache
 
 api = Blueprint("api", __name__)
 
@@ -11,6 +13,13 @@ api = Blueprint("api", __name__)
 #     require_api_access(g.cfg)
 
 
+@api.after_request
+def set_api_ticket(response: Response) -> Response:
+    if "api_ticket" in g:
+        response.headers["X-API-Ticket"] = g.api_ticket
+    return response
+
+
 @api.route("/health", methods=["GET"])
 def health() -> Response:
     require_api_access(PermissionAction.HEALTH.value)
@@ -19,35 +28,68 @@ def health() -> Response:
     print(conf.certs)
     
     for cert in conf.certs:
+        ocsp_entry = get_ocsp_cache().get(cert.key)
         certs_health.append({ 
             "key": cert.key, 
             "status": "OK", 
-            "expireDate": "null" 
+            "expireDate": "null",
+            "ocspNextUpdate": ocsp_entry.next_update.isoformat() if ocsp_entry and ocsp_entry.next_update else None
         })
     
     payload = {
         "health": "OK",
-        "certs": certs_health
+        "certs": certs_health,
+        "keyPool": get_key_pool().depths(),
+        "commands": get_executor().stats()
     }
     return build_response(code=200, data=payload)
 
 
 @api.route("/api/certs/renew", methods=["POST"])
 def renew_certs() -> Response:
-    require_api_access(PermissionAction.RENEW.value)
+    cert = require_cert_access(PermissionAction.RENEW.value)
     
     return jsonify(method="TODO - renew_certs")
 
 
 @api.route("/api/certs/issue", methods=["POST"])
 def issue_cert() -> Response:
-    require_api_access(PermissionAction.ISSUE.value)
+    cert = require_cert_access(PermissionAction.ISSUE.value)
+    try:
+        cert.require_plugin()
+    except ValueError as e:
+        abort_response(500, error=f"Cannot issue '{cert.key}' certificate: {e}")
     
     return jsonify(method="TODO - issue_cert")
 
 
 @api.route("/api/certs/<cert>", methods=["GET"])
-def get_cert() -> Response:
-    require_api_access(PermissionAction.READ.value)    
+def get_cert(cert: str) -> Response:
+    require_api_access(PermissionAction.READ.value, scope=cert)
+    conf = get_conf()
+    
+    matched_cert = next((c for c in conf.certs if c.key == cert), None)
+    if matched_cert is None:
+        abort_response(404, error=f"Certificate '{cert}' is not defined")
+    
+    live_path = matched_cert.live_path(conf.certs_dir)
+    try:
+        fullchain = (live_path / "fullchain.pem").read_text(encoding="UTF-8")
+        privkey = (live_path / "privkey.pem").read_text(encoding="UTF-8")
+    except FileNotFoundError:
+        abort_response(404, error=f"Certificate '{cert}' has not been issued yet")
     
-    return jsonify(method="TODO - get_cert")
+    try:
+        ocsp_entry = get_ocsp_cache().get(cert, serial=leaf_serial(fullchain.encode("UTF-8")))
+    except ValueError:
+        ocsp_entry = None
+    
+    payload = {
+        "key": cert,
+        "fullchain": fullchain,
+        "privkey": privkey,
+        "ocsp": base64.b64encode(ocsp_entry.response).decode("ascii") if ocsp_entry else None,
+        "ocspStatus": ocsp_entry.status if ocsp_entry else None,
+        "ocspNextUpdate": ocsp_entry.next_update.isoformat() if ocsp_entry and ocsp_entry.next_update else None
+    }
+    return build_response(code=200, data=payload)
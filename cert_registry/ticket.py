@@ -0,0 +1,73 @@
+import hmac
+import json
+import time
+import base64
+import hashlib
+import binascii
+from dataclasses import dataclass
+from .models.token import Token, TokenPermission
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+@dataclass(frozen=True)
+class Ticket:
+    token: str
+    ip: str
+    permissions: tuple[TokenPermission, ...]
+    expires: int
+    epoch: str
+
+    @classmethod
+    def issue(cls, token: Token, src_addr: str, epoch: str, ttl: int) -> "Ticket":
+        return cls(
+            token=token.name,
+            ip=src_addr,
+            permissions=tuple(token.permissions),
+            expires=int(time.time()) + ttl,
+            epoch=epoch
+        )
+
+    @classmethod
+    def decode(cls, value: str, key: bytes) -> "Ticket | None":
+        try:
+            payload, signature = value.split(".", 1)
+            if not hmac.compare_digest(_b64decode(signature), cls._sign(payload, key)):
+                return None
+            data = json.loads(_b64decode(payload))
+            return cls(
+                token=data["tid"],
+                ip=data["ip"],
+                permissions=tuple(TokenPermission(*p.rsplit(":", 1)) for p in data["perms"]),
+                expires=int(data["exp"]),
+                epoch=data["epoch"]
+            )
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            return None
+
+    def encode(self, key: bytes) -> str:
+        data = {
+            "tid": self.token,
+            "ip": self.ip,
+            "perms": [str(p) for p in self.permissions],
+            "exp": self.expires,
+            "epoch": self.epoch
+        }
+        payload = _b64encode(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        return f"{payload}.{_b64encode(self._sign(payload, key))}"
+
+    def is_valid(self, src_addr: str | None, epoch: str) -> bool:
+        return self.ip == src_addr and self.epoch == epoch and self.expires > time.time()
+
+    def allows(self, scope: str | None, action: str) -> bool:
+        return any(permission.allows(scope, action) for permission in self.permissions)
+
+    @staticmethod
+    def _sign(payload: str, key: bytes) -> bytes:
+        return hmac.new(key, f"ticket.{payload}".encode("ascii"), hashlib.sha256).digest()
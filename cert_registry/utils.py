@@ -1,9 +1,14 @@
-import subprocess
 from datetime import datetime, timezone
 from typing import cast, Any, NoReturn
 from http import HTTPStatus
 from flask import Response, abort, jsonify, g, request, current_app as app
 from .models.config import Config
+from .models.cert import Cert
+from .models.token import Token
+from .key_pool import KeyPool
+from .executor import CommandExecutor
+from .ticket import Ticket
+from .ocsp import OcspCache
 import hmac, hashlib
 
 def get_conf() -> Config:
@@ -12,35 +17,66 @@ def get_conf() -> Config:
     return g.conf
 
 
-def require_api_access(action: str, scope: str | None = None) -> None:
+def get_key_pool() -> KeyPool:
+    return cast(KeyPool, app.extensions["key_pool"])
+
+
+def get_executor() -> CommandExecutor:
+    return cast(CommandExecutor, app.extensions["executor"])
+
+
+def get_ocsp_cache() -> OcspCache:
+    return cast(OcspCache, app.extensions["ocsp_cache"])
+
+
+def authenticate_api_access() -> Token | Ticket:
+    conf = get_conf()
+    src_addr = get_remote_ip()
+    
+    ticket_value = request.headers.get("X-API-Ticket", None)
+    if ticket_value and conf.ticket_ttl > 0:
+        ticket = Ticket.decode(ticket_value, conf.hmac_secret())
+        if ticket is not None and ticket.is_valid(src_addr, conf.ticket_epoch):
+            return ticket
+    
     token = request.headers.get("X-API-Token", None)
-    print(token)
-    if not token or token == "":
+    if not token:
         abort_response(401, error="Authorization is required to access this endpoint")
-    else:
-        src_addr = get_remote_ip()
-        conf = get_conf()
-        matched_token = [t for t in conf.tokens if t.value == token]
-        print(matched_token)
-        
-        
-        
-        
-    #[env for env in cls.REQUIRED_ENVS if not params.get(env)]
-    #You do not have access to this page or resource
-    # print(request.headers)
     
-    # print(token)
-    # print(src_addr)
-    # print(action)
+    hmac_key = conf.hmac_secret()
+    matched_token = next((t for t in conf.tokens if t.matches(token, hmac_key)), None)
+    if matched_token is None:
+        abort_response(401, error="Invalid API token")
+    if not matched_token.allows_ip(src_addr):
+        abort_response(403, error="You do not have access to this page or resource")
     
+    if conf.ticket_ttl > 0:
+        ticket = Ticket.issue(matched_token, src_addr, conf.ticket_epoch, conf.ticket_ttl)
+        g.api_ticket = ticket.encode(conf.hmac_secret())
+    return matched_token
+
+
+def require_api_access(action: str, scope: str | None = None) -> None:
+    grantee = authenticate_api_access()
+    if not grantee.allows(scope, action):
+        abort_response(403, error="You do not have access to this page or resource")
+
+
+def require_cert_access(action: str) -> Cert:
+    # Authenticate before looking at the body, so anonymous callers get 401 instead of a body validation error
+    grantee = authenticate_api_access()
     
-    #if not expected: # TODO - make required in config.py or implements different tokens for each remote addr and domain
-    #    abort(500, "API_TOKEN not configured")
+    body = request.get_json(silent=True)
+    cert_key = body.get("cert") if isinstance(body, dict) else None
+    if not cert_key or not isinstance(cert_key, str):
+        abort_response(400, error=f"Field 'cert' with key of certificate to {action} is required")
+    if not grantee.allows(cert_key, action):
+        abort_response(403, error="You do not have access to this page or resource")
     
-    #token = request.headers.get("X-API-Token")
-    #if token != expected:
-    #    abort (401, "Unauthorized") # TODO - Make json
+    cert = next((c for c in get_conf().certs if c.key == cert_key), None)
+    if cert is None:
+        abort_response(404, error=f"Certificate '{cert_key}' is not defined")
+    return cert
 
 
 def get_remote_ip() -> str | None:
@@ -78,17 +114,3 @@ def build_response(code: int = 200, data: Any = None, error: str | None = None)
 
 def abort_response(code: int, error: str) -> NoReturn:
     abort(build_response(code, error=error))
-    
-
-def run_cmd(cmd: str, check: bool=True) -> str:
-    process = subprocess.run(
-        cmd, 
-        shell=True, 
-        stdin=subprocess.DEVNULL, 
-        stderr=subprocess.PIPE, 
-        stdout=subprocess.PIPE, 
-        check=check, 
-        text=True, 
-        executable="/bin/bash"
-    )
-    return process.stdout or process.stderr
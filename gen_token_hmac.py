@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import sys
 import base64
 import hmac
 import hashlib
@@ -8,16 +9,39 @@ import argparse
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="TODO")
     parser.add_argument("-k", "--hmac-key", required=True, help="TODO")
-    parser.add_argument("-n", "--token-name", required=True, help="TODO")
-    parser.add_argument("-v", "--token-value", required=True, help="TODO")
+    parser.add_argument("-n", "--token-name", help="TODO")
+    parser.add_argument("-v", "--token-value", help="TODO")
+    parser.add_argument("-b", "--batch", action="store_true", help="Read '<token_name> <token_value>' pairs from stdin, one per line, and print '<token_name> <hmac>' for each of them")
+
+    args = parser.parse_args()
+    if not args.batch and (not args.token_name or not args.token_value):
+        parser.error("the following arguments are required: -n/--token-name, -v/--token-value (or -b/--batch)")
+    return args
+
+
+def gen_hmac(key: bytes, token_name: str, token_value: str) -> str:
+    token = f"{token_name}.{token_value}".encode()
+    return hmac.new(key, token, hashlib.sha256).hexdigest()
 
-    return parser.parse_args()
 
 if __name__ == "__main__":
     args = parse_args()
-    
     key = base64.b64decode(args.hmac_key)
-    token = f"{args.token_name}.{args.token_value}".encode()
-    print(hmac.new(key, token, hashlib.sha256).hexdigest())
-    
-    
+
+    if not args.batch:
+        print(gen_hmac(key, args.token_name, args.token_value))
+        sys.exit(0)
+
+    output = []
+    for i, line in enumerate(sys.stdin, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            token_name, token_value = line.split(None, 1)
+        except ValueError:
+            sys.exit(f"Invalid input at line {i}, expected '<token_name> <token_value>'")
+        output.append(f"{token_name} {gen_hmac(key, token_name, token_value)}")
+
+    if output:
+        sys.stdout.write("\n".join(output) + "\n")
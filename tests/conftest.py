@@ -0,0 +1,59 @@
+import hmac
+import base64
+import hashlib
+import pytest
+from flask import Flask
+from cert_registry.models.cert import Cert
+from cert_registry.models.config import Config
+from cert_registry.models.token import Token, TokenPermission
+from cert_registry.key_pool import KeyPool
+from cert_registry.executor import CommandExecutor
+from cert_registry.ocsp import OcspCache
+from cert_registry.routes import api as api_blueprint
+
+HMAC_KEY = base64.b64encode(b"k" * 32).decode()
+
+
+def make_token(name: str, value: str, permissions: list[str], allowed_ips: list[str] | None = None) -> Token:
+    # Same digest as gen_token_hmac.py produces
+    digest = hmac.new(base64.b64decode(HMAC_KEY), f"{name}.{value}".encode(), hashlib.sha256).hexdigest()
+    return Token(
+        name=name,
+        value=digest,
+        allowed_ips=allowed_ips or ["127.0.0.1/32"],
+        permissions=[TokenPermission(*p.rsplit(":", 1)) for p in permissions]
+    )
+
+
+@pytest.fixture
+def tokens() -> list[Token]:
+    return [
+        make_token("TOKEN_ADMIN", "admin-secret", ["*:*"]),
+        make_token("TOKEN_EXAMPLE", "example-secret", ["example.com:read", "example.com:renew", "example.com:issue", "example.com:health"]),
+        make_token("TOKEN_REMOTE", "remote-secret", ["*:*"], allowed_ips=["192.0.2.0/24"])
+    ]
+
+
+@pytest.fixture
+def config(tmp_path, tokens) -> Config:
+    certs = [
+        Cert(key="example.com", email="admin@example.com", domains=("example.com",), plugin="dns-route53"),
+        Cert(key="other.com", email="admin@other.com", domains=("other.com",), plugin="dns-route53")
+    ]
+    return Config(certs_dir=str(tmp_path), hmac_key=HMAC_KEY, certs=certs, tokens=tokens, ticket_epoch="epoch-1")
+
+
+@pytest.fixture
+def app(config) -> Flask:
+    app = Flask(__name__)
+    app.extensions["config"] = config
+    app.extensions["key_pool"] = KeyPool.from_certs(config.certs, depth=0, workers=1)
+    app.extensions["executor"] = CommandExecutor(1, 5)
+    app.extensions["ocsp_cache"] = OcspCache(config.certs, config.certs_dir, workers=0)
+    app.register_blueprint(api_blueprint)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
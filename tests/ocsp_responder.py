@@ -0,0 +1,116 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from cryptography import x509
+from cryptography.x509 import ocsp
+from cryptography.x509.oid import NameOID, AuthorityInformationAccessOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+
+def _name(common_name: str) -> x509.Name:
+    return x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+
+
+# Local OCSP responder stub, signs GOOD responses for leaves issued by its throwaway CA
+class OcspResponder:
+    def __init__(self, path: str = "/") -> None:
+        now = datetime.now(timezone.utc)
+        self.path = path
+        self.requests: list[str] = []
+        self.tamper = False
+        self.ca_key = ec.generate_private_key(ec.SECP256R1())
+        self.ca = (
+            x509.CertificateBuilder()
+            .subject_name(_name("Test CA"))
+            .issuer_name(_name("Test CA"))
+            .public_key(self.ca_key.public_key())
+            .serial_number(1)
+            .not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=30))
+            .sign(self.ca_key, hashes.SHA256())
+        )
+        self._leaves: dict[int, x509.Certificate] = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}{self.path}"
+
+    def start(self) -> "OcspResponder":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def issue_leaf(self, serial: int, domain: str = "example.com") -> x509.Certificate:
+        now = datetime.now(timezone.utc)
+        aia = x509.AuthorityInformationAccess([
+            x509.AccessDescription(AuthorityInformationAccessOID.OCSP, x509.UniformResourceIdentifier(self.url))
+        ])
+        leaf = (
+            x509.CertificateBuilder()
+            .subject_name(_name(domain))
+            .issuer_name(self.ca.subject)
+            .public_key(ec.generate_private_key(ec.SECP256R1()).public_key())
+            .serial_number(serial)
+            .not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=30))
+            .add_extension(aia, critical=False)
+            .sign(self.ca_key, hashes.SHA256())
+        )
+        self._leaves[serial] = leaf
+        return leaf
+
+    def write_live(self, certs_dir: Path, cert_key: str, leaf: x509.Certificate) -> None:
+        live_path = certs_dir / "live" / cert_key
+        live_path.mkdir(parents=True, exist_ok=True)
+        (live_path / "cert.pem").write_bytes(leaf.public_bytes(serialization.Encoding.PEM))
+        (live_path / "chain.pem").write_bytes(self.ca.public_bytes(serialization.Encoding.PEM))
+
+    def respond(self, request_der: bytes) -> bytes:
+        request = ocsp.load_der_ocsp_request(request_der)
+        now = datetime.now(timezone.utc)
+        response = (
+            ocsp.OCSPResponseBuilder()
+            .add_response(
+                cert=self._leaves[request.serial_number],
+                issuer=self.ca,
+                algorithm=hashes.SHA1(),
+                cert_status=ocsp.OCSPCertStatus.GOOD,
+                this_update=now,
+                next_update=now + timedelta(days=4),
+                revocation_time=None,
+                revocation_reason=None
+            )
+            .responder_id(ocsp.OCSPResponderEncoding.HASH, self.ca)
+            .sign(self.ca_key, hashes.SHA256())
+        )
+        body = bytearray(response.public_bytes(serialization.Encoding.DER))
+        if self.tamper:
+            body[-1] ^= 1 # Last byte belongs to the signature
+        return bytes(body)
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        responder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                responder.requests.append(self.path)
+                body = responder.respond(self.rfile.read(int(self.headers["Content-Length"])))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/ocsp-response")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
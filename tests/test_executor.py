@@ -0,0 +1,97 @@
+import time
+import logging
+import threading
+import pytest
+from cert_registry.executor import CommandExecutor, CommandError
+
+
+class SlowHandler(logging.Handler):
+    def __init__(self, delay: float) -> None:
+        super().__init__()
+        self.delay = delay
+        self.lines: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        time.sleep(self.delay)
+        self.lines.append(record.getMessage())
+
+
+def make_log(name: str, handler: logging.Handler) -> logging.Logger:
+    log = logging.getLogger(f"tests.executor.{name}")
+    log.handlers = [handler]
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    return log
+
+
+def test_output_is_streamed_line_by_line(caplog) -> None:
+    executor = CommandExecutor(max_concurrency=1, timeout=5)
+    with caplog.at_level(logging.INFO):
+        result = executor.run(["sh", "-c", "echo out; echo err >&2; printf 'bad \\377 byte\\n'"])
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert result.ok and result.returncode == 0
+    assert "out" in messages and "err" in messages and "bad � byte" in messages
+
+
+def test_timeout_kills_command() -> None:
+    executor = CommandExecutor(max_concurrency=1, timeout=1)
+    result = executor.run(["sh", "-c", "sleep 10"], check=False)
+
+    assert result.timed_out and not result.ok
+    assert result.duration < 5
+    with pytest.raises(CommandError, match="timed out"):
+        executor.run(["sh", "-c", "sleep 10"])
+    assert executor.stats()["timeouts"] == 2
+
+
+def test_cancel_terminates_command() -> None:
+    executor = CommandExecutor(max_concurrency=1, timeout=30)
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    result = executor.run(["sh", "-c", "sleep 10"], cancel=cancel, check=False)
+
+    assert result.cancelled and not result.timed_out
+    assert result.duration < 5
+
+
+def test_waiting_for_slot_counts_towards_timeout() -> None:
+    executor = CommandExecutor(max_concurrency=1, timeout=30)
+    holder = threading.Thread(target=executor.run, args=(["sh", "-c", "sleep 2"],))
+    holder.start()
+    time.sleep(0.2)
+
+    result = executor.run(["sh", "-c", "echo never"], timeout=0.6, check=False)
+    holder.join()
+
+    assert result.timed_out and result.returncode is None
+    assert executor.stats()["running"] == 0
+
+
+def test_lingering_child_holding_output_times_out() -> None:
+    executor = CommandExecutor(max_concurrency=1, timeout=1)
+    start = time.monotonic()
+    result = executor.run(["sh", "-c", "sleep 8 & echo started"], check=False)
+
+    assert result.timed_out and result.returncode == 0
+    assert time.monotonic() - start < 4
+
+
+def test_draining_output_after_exit_is_not_a_timeout() -> None:
+    handler = SlowHandler(delay=0.3)
+    executor = CommandExecutor(max_concurrency=1, timeout=0.5)
+    result = executor.run(["sh", "-c", "echo a; echo b; echo c"], log=make_log("drain", handler), check=False)
+
+    assert result.ok
+    assert handler.lines[1:4] == ["a", "b", "c"]
+
+
+def test_missing_binary_is_reported_as_result() -> None:
+    executor = CommandExecutor(max_concurrency=1, timeout=5)
+    result = executor.run(["/nonexistent/certbot", "renew"], check=False)
+
+    assert not result.ok and result.error and result.returncode is None
+    with pytest.raises(CommandError, match="failed to start"):
+        executor.run(["/nonexistent/certbot", "renew"])
+    assert executor.stats()["errors"] == 2
+    assert executor.stats()["failures"] == 2
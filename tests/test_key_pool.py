@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import Future
+from cert_registry.models.cert import Cert
+from cert_registry.key_pool import KeyPool, KeySpec
+
+
+class FinishedExecutor:
+    def submit(self, fn, spec: KeySpec) -> Future:
+        future = Future()
+        future.set_result(f"key-{spec}".encode())
+        return future
+
+
+def make_cert(**kwargs) -> Cert:
+    return Cert(key="example.com", email="admin@example.com", domains=("example.com",), plugin="dns-route53", **kwargs)
+
+
+def test_refill_with_finished_futures_does_not_deadlock() -> None:
+    cert = make_cert()
+    pool = KeyPool.from_certs([cert], depth=3, workers=1)
+    pool._executor = FinishedExecutor()
+
+    thread = threading.Thread(target=pool._refill, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert pool.depths() == { "ecdsa-secp256r1": 3 }
+    assert pool._pending == { KeySpec.from_cert(cert): 0 }
+    assert pool._lock.acquire(blocking=False)
+
+
+def test_acquire_takes_pooled_key_and_refill_tops_up() -> None:
+    cert = make_cert(key_type="rsa", rsa_key_size=4096)
+    pool = KeyPool.from_certs([cert], depth=2, workers=1)
+    pool._executor = FinishedExecutor()
+    pool._refill()
+
+    assert pool.acquire(cert) == b"key-rsa-4096"
+    assert pool.depths() == { "rsa-4096": 1 }
+
+    pool._refill()
+    assert pool.depths() == { "rsa-4096": 2 }
+
+
+def test_disabled_pool_generates_inline_without_warning(monkeypatch, caplog) -> None:
+    cert = make_cert()
+    pool = KeyPool.from_certs([cert], depth=0, workers=1)
+    monkeypatch.setattr("cert_registry.key_pool.generate_key", lambda spec: f"inline-{spec}".encode())
+
+    assert pool.acquire(cert) == b"inline-ecdsa-secp256r1"
+    assert pool.depths() == {}
+    assert not [r for r in caplog.records if r.levelname == "WARNING"]
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+import pytest
+from cert_registry.models.cert import Cert
+from cert_registry.ocsp import OcspCache, leaf_serial
+from cryptography.hazmat.primitives import serialization
+from .ocsp_responder import OcspResponder
+
+CERT = Cert(key="example.com", email="admin@example.com", domains=("example.com",), plugin="dns-route53")
+
+
+@pytest.fixture
+def responder():
+    responder = OcspResponder().start()
+    yield responder
+    responder.stop()
+
+
+def make_cache(tmp_path) -> OcspCache:
+    return OcspCache([CERT], str(tmp_path), workers=1)
+
+
+def test_good_response_is_cached(tmp_path, responder) -> None:
+    leaf = responder.issue_leaf(serial=100)
+    responder.write_live(tmp_path, CERT.key, leaf)
+    cache = make_cache(tmp_path)
+    cache._refresh(CERT)
+
+    entry = cache.get(CERT.key, serial=leaf_serial(leaf.public_bytes(serialization.Encoding.PEM)))
+    assert entry is not None and entry.serial == 100 and entry.status == "GOOD"
+    assert (tmp_path / "ocsp" / "example.com.der").read_bytes() == entry.response
+    assert len(responder.requests) == 1
+
+
+def test_serial_mismatch_triggers_refresh(tmp_path, responder) -> None:
+    responder.write_live(tmp_path, CERT.key, responder.issue_leaf(serial=100))
+    cache = make_cache(tmp_path)
+    cache._refresh(CERT)
+
+    # Renewed certificate
+    responder.write_live(tmp_path, CERT.key, responder.issue_leaf(serial=101))
+    assert cache.get(CERT.key, serial=101) is None
+    assert cache._due[CERT.key] <= datetime.now(timezone.utc)
+    assert cache._wakeup.is_set()
+
+    cache._refresh(CERT)
+    assert cache.get(CERT.key, serial=101).serial == 101
+    assert len(responder.requests) == 2
+
+
+def test_bad_signature_is_rejected(tmp_path, responder) -> None:
+    responder.tamper = True
+    responder.write_live(tmp_path, CERT.key, responder.issue_leaf(serial=100))
+    cache = make_cache(tmp_path)
+    cache._refresh(CERT)
+
+    assert cache.get(CERT.key) is None
+    assert not (tmp_path / "ocsp" / "example.com.der").exists()
+
+
+def test_second_cache_reuses_file_without_responder(tmp_path, responder) -> None:
+    responder.write_live(tmp_path, CERT.key, responder.issue_leaf(serial=100))
+    make_cache(tmp_path)._refresh(CERT)
+
+    other_worker = make_cache(tmp_path)
+    other_worker._refresh(CERT)
+
+    assert other_worker.get(CERT.key, serial=100) is not None
+    assert len(responder.requests) == 1
+
+
+def test_query_string_of_responder_url_is_kept(tmp_path) -> None:
+    responder = OcspResponder(path="/ocsp?tenant=1").start()
+    try:
+        responder.write_live(tmp_path, CERT.key, responder.issue_leaf(serial=100))
+        make_cache(tmp_path)._refresh(CERT)
+    finally:
+        responder.stop()
+
+    assert responder.requests == ["/ocsp?tenant=1"]
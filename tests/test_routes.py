@@ -0,0 +1,46 @@
+import pytest
+from cert_registry.models.require import Require
+
+
+@pytest.fixture(autouse=True)
+def installed_plugin(monkeypatch) -> None:
+    monkeypatch.setattr(Require, "_is_module_installed", staticmethod(lambda module_name: True))
+
+
+def test_issue_requires_authentication_before_body(client) -> None:
+    response = client.post("/api/certs/issue", json=["example.com"])
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("body", [["example.com"], "example.com", { "cert": 1 }, {}, None])
+def test_issue_rejects_invalid_body(client, body) -> None:
+    response = client.post("/api/certs/issue", json=body, headers={ "X-API-Token": "admin-secret" })
+    assert response.status_code == 400
+
+
+def test_issue_checks_scope_and_cert(client) -> None:
+    headers = { "X-API-Token": "example-secret" }
+    assert client.post("/api/certs/issue", json={ "cert": "example.com" }, headers=headers).status_code == 200
+    assert client.post("/api/certs/issue", json={ "cert": "other.com" }, headers=headers).status_code == 403
+    assert client.post("/api/certs/issue", json={ "cert": "missing.com" }, headers={ "X-API-Token": "admin-secret" }).status_code == 404
+
+
+def test_issue_checks_plugin_of_issued_cert_only(client, monkeypatch) -> None:
+    monkeypatch.setattr(Require, "_is_module_installed", staticmethod(lambda module_name: False))
+    response = client.post("/api/certs/issue", json={ "cert": "example.com" }, headers={ "X-API-Token": "admin-secret" })
+
+    assert response.status_code == 500
+    assert "'example.com'" in response.get_json()["error"]
+
+
+def test_renew_is_scoped_per_cert(client) -> None:
+    headers = { "X-API-Token": "example-secret" }
+    assert client.post("/api/certs/renew", json={ "cert": "example.com" }, headers=headers).status_code == 200
+    assert client.post("/api/certs/renew", json={ "cert": "other.com" }, headers=headers).status_code == 403
+    assert client.post("/api/certs/renew", json={}, headers=headers).status_code == 400
+
+
+def test_token_is_compared_by_hmac_digest(client, tokens) -> None:
+    assert client.get("/health", headers={ "X-API-Token": "admin-secret" }).status_code == 200
+    # Stored digest itself is not a valid bearer token
+    assert client.get("/health", headers={ "X-API-Token": tokens[0].value }).status_code == 401
@@ -0,0 +1,155 @@
+import json
+import time
+import base64
+import dataclasses
+import pytest
+from flask import Flask
+from cert_registry.ticket import Ticket, _b64encode, _b64decode
+from cert_registry.models.config import Config
+from cert_registry.models.token import TokenPermission, PermissionAction
+from cert_registry.utils import require_api_access
+from .conftest import HMAC_KEY, make_token
+
+KEY = base64.b64decode(HMAC_KEY)
+EXAMPLE_TOKEN = make_token("TOKEN_EXAMPLE", "example-secret", ["example.com:read", "example.com:health"])
+
+
+def issue(ttl: int = 60, ip: str = "127.0.0.1", epoch: str = "epoch-1") -> str:
+    return Ticket.issue(EXAMPLE_TOKEN, ip, epoch, ttl).encode(KEY)
+
+
+def test_roundtrip() -> None:
+    ticket = Ticket.decode(issue(), KEY)
+
+    assert ticket.token == "TOKEN_EXAMPLE"
+    assert ticket.permissions == (TokenPermission("example.com", "read"), TokenPermission("example.com", "health"))
+    assert ticket.is_valid("127.0.0.1", "epoch-1")
+
+
+def test_tampered_signature_is_rejected() -> None:
+    payload, signature = issue().split(".")
+    forged = bytearray(_b64decode(signature))
+    forged[0] ^= 1
+
+    assert Ticket.decode(f"{payload}.{_b64encode(bytes(forged))}", KEY) is None
+    assert Ticket.decode(issue(), b"other-key") is None
+    assert Ticket.decode("not-a-ticket", KEY) is None
+
+
+def test_tampered_payload_is_rejected() -> None:
+    payload, signature = issue().split(".")
+    data = json.loads(_b64decode(payload))
+    data["perms"] = ["*:*"]
+    forged_payload = _b64encode(json.dumps(data, separators=(",", ":")).encode())
+
+    assert Ticket.decode(f"{forged_payload}.{signature}", KEY) is None
+
+
+def test_expired_ticket_is_invalid(monkeypatch) -> None:
+    ticket = Ticket.decode(issue(ttl=60), KEY)
+    monkeypatch.setattr(time, "time", lambda: ticket.expires + 1)
+
+    assert not ticket.is_valid("127.0.0.1", "epoch-1")
+
+
+def test_ticket_is_bound_to_source_ip_and_epoch() -> None:
+    ticket = Ticket.decode(issue(), KEY)
+
+    assert not ticket.is_valid("127.0.0.2", "epoch-1")
+    assert not ticket.is_valid(None, "epoch-1")
+    assert not ticket.is_valid("127.0.0.1", "epoch-2")
+
+
+def test_config_epoch_changes_with_config(tmp_path, monkeypatch) -> None:
+    conf_file = tmp_path / "config.yaml"
+    for env, val in { "HMAC_KEY": HMAC_KEY, "AWS_ACCESS_KEY_ID": "id", "AWS_SECRET_ACCESS_KEY": "secret", "CONF_FILE": str(conf_file), "TOKEN_ADMIN": "digest" }.items():
+        monkeypatch.setenv(env, val)
+
+    conf_file.write_text('tokens:\n  - env: TOKEN_ADMIN\n    allowed_ips: ["127.0.0.1/32"]\n    permissions: ["*:health", "*:read"]\n')
+    epoch = Config.load().ticket_epoch
+    assert Config.load().ticket_epoch == epoch
+
+    conf_file.write_text('tokens:\n  - env: TOKEN_ADMIN\n    allowed_ips: ["127.0.0.1/32"]\n    permissions: ["*:read"]\n')
+    changed_epoch = Config.load().ticket_epoch
+    assert changed_epoch != epoch
+
+    monkeypatch.setenv("TOKEN_ADMIN", "rotated-digest")
+    assert Config.load().ticket_epoch not in (epoch, changed_epoch)
+
+
+@pytest.mark.parametrize(
+    ("permission", "scope", "action", "allowed"),
+    [
+        ("example.com:read", "example.com", "read", True),
+        ("example.com:read", "other.com", "read", False),
+        ("example.com:*", "example.com", "renew", True),
+        ("*:read", "other.com", "read", True),
+        ("example.com:health", None, "health", True),
+        ("example.com:renew", None, "renew", False),
+        ("example.com:issue", None, "issue", False),
+        ("*:renew", None, "renew", True),
+        ("*:read", None, "renew", False)
+    ]
+)
+def test_permission_scope(permission: str, scope: str | None, action: str, allowed: bool) -> None:
+    assert TokenPermission(*permission.split(":")).allows(scope, action) is allowed
+
+
+@pytest.fixture
+def unscoped_app(app: Flask) -> Flask:
+    @app.route("/test/unscoped-renew")
+    def unscoped_renew() -> str:
+        require_api_access(PermissionAction.RENEW.value)
+        return "ok"
+    return app
+
+
+def get_ticket(client, token: str = "example-secret") -> str:
+    response = client.get("/health", headers={ "X-API-Token": token })
+    assert response.status_code == 200
+    return response.headers["X-API-Ticket"]
+
+
+def test_ticket_replaces_token(client) -> None:
+    ticket = get_ticket(client)
+
+    assert client.get("/health", headers={ "X-API-Ticket": ticket }).status_code == 200
+    assert client.get("/health", headers={ "X-API-Ticket": ticket[:-2] + "AA" }).status_code == 401
+
+
+def test_ticket_from_other_ip_is_rejected(client) -> None:
+    ticket = get_ticket(client)
+    response = client.get("/health", headers={ "X-API-Ticket": ticket }, environ_base={ "REMOTE_ADDR": "127.0.0.2" })
+
+    assert response.status_code == 401
+
+
+def test_ticket_is_rejected_after_config_reload(app, client, config) -> None:
+    ticket = get_ticket(client)
+    app.extensions["config"] = dataclasses.replace(config, ticket_epoch="epoch-2")
+
+    assert client.get("/health", headers={ "X-API-Ticket": ticket }).status_code == 401
+
+
+def test_token_outside_allowed_ips_is_rejected(client) -> None:
+    assert client.get("/health", headers={ "X-API-Token": "remote-secret" }).status_code == 403
+    assert client.get("/health", headers={ "X-API-Token": "remote-secret" }, environ_base={ "REMOTE_ADDR": "192.0.2.10" }).status_code == 200
+
+
+def test_non_ascii_token_is_unauthorized(client) -> None:
+    assert client.get("/health", headers={ "X-API-Token": "zażółć".encode().decode("latin-1") }).status_code == 401
+
+
+@pytest.mark.parametrize("use_ticket", [False, True])
+def test_scope_checks(unscoped_app, use_ticket: bool) -> None:
+    client = unscoped_app.test_client()
+    headers = { "X-API-Ticket": get_ticket(client) } if use_ticket else { "X-API-Token": "example-secret" }
+
+    # Not issued yet, but access passed
+    assert client.get("/api/certs/example.com", headers=headers).status_code == 404
+    assert client.get("/api/certs/other.com", headers=headers).status_code == 403
+    assert client.get("/health", headers=headers).status_code == 200
+    assert client.get("/test/unscoped-renew", headers=headers).status_code == 403
+
+    admin_headers = { "X-API-Ticket": get_ticket(client, "admin-secret") } if use_ticket else { "X-API-Token": "admin-secret" }
+    assert client.get("/test/unscoped-renew", headers=admin_headers).status_code == 200